@@ -58,7 +58,7 @@ cd "$INSTALL_DIR"
 python3 -m venv venv
 source venv/bin/activate
 pip install --quiet --upgrade pip
-pip install --quiet flask requests
+pip install --quiet "flask>=2.2" requests requests-toolbelt waitress
 
 echo -e "${GREEN}[5/6]${NC} Creating systemd services..."
 
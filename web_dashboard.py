@@ -4,16 +4,50 @@ A simple web interface for monitoring and managing the timelapse system.
 """
 
 from flask import Flask, jsonify, render_template, send_file, request
+from flask.json.provider import DefaultJSONProvider
 from datetime import datetime
-from ftplib import FTP
+from ftplib import FTP, all_errors, error_perm
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import atexit
 import os
+import queue
 import shutil
+import signal
 import subprocess
+import tempfile
 import json
+try:
+    import orjson
+except ImportError:
+    orjson = None  # Optional; config files and API responses fall back to the stdlib json module
+import sqlite3
 import sys
+import threading
+import time
+from collections import OrderedDict
 
 app = Flask(__name__, template_folder='templates', static_folder='static')
 
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider that encodes jsonify() responses with orjson"""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default, option=orjson.OPT_SORT_KEYS).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+if orjson:
+    app.json = OrjsonProvider(app)
+
+# Behind a front-end server that honours X-Sendfile (Apache mod_xsendfile,
+# lighttpd), let it send image files straight from disk instead of Python
+app.config["USE_X_SENDFILE"] = os.environ.get("VTIME_X_SENDFILE") == "1"
+
+# Snapshot filenames embed the capture time and never change once written
+IMAGE_MAX_AGE = 365 * 24 * 60 * 60  # seconds
+
 # === CONFIGURATION ===
 CONFIG_FILE = "./dashboard_config.json"
 DEFAULT_CONFIG = {
@@ -30,20 +64,17 @@ DEFAULT_CONFIG = {
         "password": "ftppass",
         "remote_root": "/timelapse",
         "passive_mode": True,
-        "upload_interval_minutes": 60
+        "upload_interval_minutes": 60,
+        "upload_workers": 4
     }
 }
 
 def load_config():
     """Load configuration from file or exit with helpful message if missing"""
-    if not os.path.exists(CONFIG_FILE):
-        print(f"[ERROR] Config file not found: {CONFIG_FILE}")
-        print(f"Please copy dashboard_config.example.json to {CONFIG_FILE} and edit it.")
-        sys.exit(1)
-
     try:
-        with open(CONFIG_FILE, 'r') as f:
-            config = json.load(f)
+        with open(CONFIG_FILE, 'rb') as f:
+            data = f.read()
+            config = orjson.loads(data) if orjson else json.loads(data)
             # Merge with defaults for any missing keys
             for key in DEFAULT_CONFIG:
                 if key not in config:
@@ -53,61 +84,295 @@ def load_config():
                     if key not in config['ftp']:
                         config['ftp'][key] = DEFAULT_CONFIG['ftp'][key]
             return config
+    except FileNotFoundError:
+        print(f"[ERROR] Config file not found: {CONFIG_FILE}")
+        print(f"Please copy dashboard_config.example.json to {CONFIG_FILE} and edit it.")
+        sys.exit(1)
     except json.JSONDecodeError as e:
         print(f"[ERROR] Invalid JSON in {CONFIG_FILE}: {e}")
         sys.exit(1)
 
+# The settings UI tends to save several fields back to back; saves within this
+# window are coalesced into one write
+CONFIG_SAVE_DELAY = 0.5  # seconds
+_config_save_timer = None
+_config_save_pending = None
+_config_save_lock = threading.Lock()
+_config_write_lock = threading.Lock()
+
 def save_config(config):
-    """Save configuration to file"""
-    with open(CONFIG_FILE, 'w') as f:
-        json.dump(config, f, indent=2)
+    """Save configuration to file (written shortly after, see CONFIG_SAVE_DELAY)"""
+    global _config_save_timer, _config_save_pending
+    _config_values.clear()
+    with _config_save_lock:
+        _config_save_pending = config
+        if _config_save_timer is None:
+            _config_save_timer = threading.Timer(CONFIG_SAVE_DELAY, flush_config)
+            _config_save_timer.daemon = True
+            _config_save_timer.start()
+
+@atexit.register
+def flush_config():
+    """Write a pending save_config() to disk now"""
+    global _config_save_timer, _config_save_pending
+    with _config_save_lock:
+        if _config_save_timer is None:
+            return
+        _config_save_timer.cancel()
+        _config_save_timer = None
+        pending, _config_save_pending = _config_save_pending, None
+    try:
+        _write_config(pending)
+    except OSError as e:
+        print(f"[Config] Failed to save {CONFIG_FILE}: {e}")
+
+def _write_config(config):
+    """Atomically replace the config file, so a crash can't leave it half-written"""
+    if orjson:
+        data = orjson.dumps(config, option=orjson.OPT_INDENT_2)
+    else:
+        data = json.dumps(config, indent=2).encode()
+    tmp_file = CONFIG_FILE + ".tmp"
+    with _config_write_lock:
+        with open(tmp_file, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, CONFIG_FILE)
 
 # Load config at startup
 config = load_config()
 
+# Resolved config values, cleared by save_config() whenever the config changes
+_config_values = {}
+
+def _config_value(key):
+    try:
+        return _config_values[key]
+    except KeyError:
+        value = _config_values[key] = config.get(key, DEFAULT_CONFIG[key])
+        return value
+
 # Convenience accessors
 def get_rtsp_url():
-    return config.get('rtsp_url', DEFAULT_CONFIG['rtsp_url'])
+    return _config_value('rtsp_url')
 
 def get_base_output_dir():
-    return config.get('base_output_dir', DEFAULT_CONFIG['base_output_dir'])
+    return _config_value('base_output_dir')
 
 def get_snapshot_interval():
-    return config.get('snapshot_interval', DEFAULT_CONFIG['snapshot_interval'])
+    return _config_value('snapshot_interval')
 
 def get_retention_days():
-    return config.get('retention_days', DEFAULT_CONFIG['retention_days'])
+    return _config_value('retention_days')
 
 def get_ftp_config():
-    return config.get('ftp', DEFAULT_CONFIG['ftp'])
+    return _config_value('ftp')
 
 def get_project_name():
-    return config.get('project_name', DEFAULT_CONFIG['project_name'])
+    return _config_value('project_name')
 
 # === HELPER FUNCTIONS ===
 
+# Paths recently found not to exist, so clients repeatedly asking for a missing
+# date or image get an answer without touching the filesystem each time
+MISSING_PATH_TTL = 30  # seconds
+MISSING_PATH_CACHE_SIZE = 256
+_missing_paths = OrderedDict()  # path -> time.monotonic() of the failed check
+_missing_paths_lock = threading.Lock()
+
+def path_missing(path):
+    """True if path doesn't exist; misses are remembered for MISSING_PATH_TTL seconds"""
+    now = time.monotonic()
+    with _missing_paths_lock:
+        checked = _missing_paths.get(path)
+        if checked is not None and now - checked < MISSING_PATH_TTL:
+            return True
+    exists = os.path.exists(path)
+    with _missing_paths_lock:
+        if exists:
+            _missing_paths.pop(path, None)
+        else:
+            _missing_paths[path] = now
+            _missing_paths.move_to_end(path)
+            if len(_missing_paths) > MISSING_PATH_CACHE_SIZE:
+                _missing_paths.popitem(last=False)
+    return not exists
+
+def forget_missing_path(path):
+    """Drop a remembered miss for a path this process has just created"""
+    with _missing_paths_lock:
+        _missing_paths.pop(path, None)
+
+# Folder stats keyed by normalized path, valid while the folder's mtime is unchanged. Day
+# folders other than today's never change, so their scans are done once.
+_folder_stats_cache = {}
+_folder_stats_lock = threading.Lock()
+
+def invalidate_folder_stats(folder_path):
+    """Drop cached stats for a folder this process has just changed"""
+    with _folder_stats_lock:
+        _folder_stats_cache.pop(os.path.normpath(folder_path), None)
+
 def get_folder_stats(folder_path):
     """Get statistics about snapshots in a folder"""
-    if not os.path.exists(folder_path):
+    folder_path = os.path.normpath(folder_path)
+    try:
+        dir_mtime = os.stat(folder_path).st_mtime_ns
+    except FileNotFoundError:
+        invalidate_folder_stats(folder_path)
         return {"count": 0, "size_mb": 0, "latest": None, "oldest": None}
 
-    jpg_files = [f for f in os.listdir(folder_path) if f.lower().endswith(".jpg")]
-    total_size = sum(os.path.getsize(os.path.join(folder_path, f)) for f in jpg_files)
+    with _folder_stats_lock:
+        cached = _folder_stats_cache.get(folder_path)
+    if cached is not None and cached[0] == dir_mtime:
+        return cached[1]
 
+    stats = _scan_folder_stats(folder_path)
+    with _folder_stats_lock:
+        _folder_stats_cache[folder_path] = (dir_mtime, stats)
+    return stats
+
+def _scan_folder_stats(folder_path):
+    """Scan a folder for snapshot count, size, latest and oldest file"""
+    count = 0
+    total_size = 0
     latest_file = None
     oldest_file = None
-    if jpg_files:
-        files_with_paths = [os.path.join(folder_path, f) for f in jpg_files]
-        latest_file = max(files_with_paths, key=os.path.getmtime)
-        oldest_file = min(files_with_paths, key=os.path.getmtime)
+    latest_mtime = None
+    oldest_mtime = None
+
+    # Single scandir pass; DirEntry.stat() gives size and mtime in one syscall
+    try:
+        with os.scandir(folder_path) as entries:
+            for entry in entries:
+                if not entry.name.lower().endswith(".jpg") or not entry.is_file(follow_symlinks=False):
+                    continue
+                try:
+                    st = entry.stat()
+                except FileNotFoundError:
+                    continue  # Removed after the directory was listed
+                count += 1
+                total_size += st.st_size
+                if latest_mtime is None or st.st_mtime > latest_mtime:
+                    latest_mtime = st.st_mtime
+                    latest_file = entry.path
+                if oldest_mtime is None or st.st_mtime < oldest_mtime:
+                    oldest_mtime = st.st_mtime
+                    oldest_file = entry.path
+    except FileNotFoundError:
+        return {"count": 0, "size_mb": 0, "latest": None, "oldest": None}
 
     return {
-        "count": len(jpg_files),
+        "count": count,
         "size_mb": round(total_size / (1024 * 1024), 2),
         "latest": latest_file,
         "oldest": oldest_file
     }
 
+def scan_date_folders(base_dir):
+    """List the YYYY-MM-DD day folders in base_dir as DirEntry objects"""
+    folders = []
+    # is_dir() is answered from the directory listing itself, no stat per folder
+    try:
+        with os.scandir(base_dir) as entries:
+            for entry in entries:
+                if not entry.is_dir(follow_symlinks=False):
+                    continue
+                try:
+                    datetime.strptime(entry.name, "%Y-%m-%d")
+                except ValueError:
+                    continue
+                folders.append(entry)
+    except FileNotFoundError:
+        pass
+    return folders
+
+# Stats of past days are also kept on disk, so a restarted dashboard doesn't rescan
+# the whole archive. One file in the output folder: writing into a day folder would
+# change the very mtime the entry is validated against.
+FOLDER_STATS_FILE = ".folder_stats.json"
+_folder_stats_loaded = set()  # Base dirs whose FOLDER_STATS_FILE has been read
+
+def _load_persisted_folder_stats(base_dir):
+    """Seed the folder stats cache from FOLDER_STATS_FILE"""
+    try:
+        with open(os.path.join(base_dir, FOLDER_STATS_FILE), 'rb') as f:
+            data = f.read()
+        persisted = orjson.loads(data) if orjson else json.loads(data)
+    except (OSError, ValueError):
+        return
+    with _folder_stats_lock:
+        for day, (dir_mtime, stats) in persisted.items():
+            _folder_stats_cache.setdefault(os.path.join(base_dir, day), (dir_mtime, stats))
+
+def _save_persisted_folder_stats(base_dir, days, today_str):
+    """Write the cached stats of the given past day folders to FOLDER_STATS_FILE"""
+    with _folder_stats_lock:
+        persisted = {}
+        for day in days:
+            cached = _folder_stats_cache.get(os.path.join(base_dir, day))
+            if cached is not None and day < today_str:
+                persisted[day] = list(cached)
+    data = orjson.dumps(persisted) if orjson else json.dumps(persisted).encode()
+    stats_file = os.path.join(base_dir, FOLDER_STATS_FILE)
+    tmp_file = f"{stats_file}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_file, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_file, stats_file)
+    except OSError as e:
+        print(f"[Stats] Failed to save folder stats: {e}")
+
+def get_all_folder_stats(base_dir):
+    """Return (day, stats) for every day folder, scanning only folders that changed"""
+    # Cache keys are normalized paths, so "pics/", "./pics" and "pics" share
+    # entries and the pruning below recognizes this base dir's day folders
+    base_dir = os.path.normpath(base_dir)
+    if base_dir not in _folder_stats_loaded:
+        _load_persisted_folder_stats(base_dir)
+        _folder_stats_loaded.add(base_dir)
+
+    stamped = []
+    for entry in scan_date_folders(base_dir):
+        try:
+            stamped.append((entry, entry.stat(follow_symlinks=False).st_mtime_ns))
+        except FileNotFoundError:
+            continue  # Deleted by cleanup after the listing
+
+    results = []
+    misses = []
+    with _folder_stats_lock:
+        for entry, dir_mtime in stamped:
+            cached = _folder_stats_cache.get(entry.path)
+            if cached is not None and cached[0] == dir_mtime:
+                results.append((entry.name, cached[1]))
+            else:
+                misses.append((entry, dir_mtime))
+
+    # In steady state only today's folder lands here
+    today_str = datetime.now().strftime("%Y-%m-%d")
+    changed = False
+    for entry, dir_mtime in misses:
+        stats = _scan_folder_stats(entry.path)
+        with _folder_stats_lock:
+            _folder_stats_cache[entry.path] = (dir_mtime, stats)
+        results.append((entry.name, stats))
+        changed = changed or entry.name < today_str
+
+    # Forget day folders that retention (or anything else) has removed
+    listed = {entry.path for entry, _ in stamped}
+    with _folder_stats_lock:
+        gone = [path for path in _folder_stats_cache
+                if os.path.dirname(path) == base_dir and path not in listed]
+        for path in gone:
+            del _folder_stats_cache[path]
+    changed = changed or bool(gone)
+
+    if changed:
+        _save_persisted_folder_stats(base_dir, [entry.name for entry, _ in stamped], today_str)
+    return results
+
 def get_system_stats():
     """Get system-level statistics"""
     base_dir = get_base_output_dir()
@@ -126,18 +391,10 @@ def get_system_stats():
     total_snapshots = 0
     total_size_mb = 0
 
-    if os.path.exists(base_dir):
-        for folder in os.listdir(base_dir):
-            folder_path = os.path.join(base_dir, folder)
-            if os.path.isdir(folder_path):
-                try:
-                    datetime.strptime(folder, "%Y-%m-%d")
-                    total_days += 1
-                    stats = get_folder_stats(folder_path)
-                    total_snapshots += stats['count']
-                    total_size_mb += stats['size_mb']
-                except ValueError:
-                    continue
+    for _, stats in get_all_folder_stats(base_dir):
+        total_days += 1
+        total_snapshots += stats['count']
+        total_size_mb += stats['size_mb']
 
     return {
         "disk_free_gb": disk_free_gb,
@@ -152,8 +409,120 @@ def get_system_stats():
 
 # === FTP FUNCTIONS ===
 
+# A few logged-in FTP connections are kept between requests so dashboard FTP
+# actions skip the connect + login handshake. Each is checked out with
+# borrow_ftp(), reset to its login directory, and returned afterwards.
+FTP_POOL_SIZE = 4  # Enough for a parallel trigger_ftp_upload at the default upload_workers
+FTP_IDLE_TIMEOUT = 300  # seconds; older pooled connections are closed instead of reused
+_ftp_pool = queue.LifoQueue(maxsize=FTP_POOL_SIZE)
+
+def _ftp_settings_key(ftp_conf):
+    return (ftp_conf['host'], ftp_conf.get('port', 21), ftp_conf['user'],
+            ftp_conf['password'], ftp_conf.get('passive_mode', True))
+
+def _quit_ftp(ftp):
+    try:
+        ftp.quit()
+    except all_errors:
+        ftp.close()
+
+@contextmanager
+def borrow_ftp(timeout=30):
+    """Yield a logged-in FTP connection from the pool, opening one if needed"""
+    ftp_conf = get_ftp_config()
+    key = _ftp_settings_key(ftp_conf)
+    ftp = None
+    while ftp is None:
+        try:
+            pooled, home, last_used, pooled_key = _ftp_pool.get_nowait()
+        except queue.Empty:
+            break
+        if pooled_key != key or time.monotonic() - last_used > FTP_IDLE_TIMEOUT:
+            _quit_ftp(pooled)
+            continue
+        try:
+            pooled.cwd(home)  # Back to the login directory; also proves the connection is alive
+            ftp = pooled
+        except all_errors:
+            pooled.close()
+
+    if ftp is None:
+        ftp = FTP()
+        ftp.connect(ftp_conf['host'], ftp_conf.get('port', 21), timeout=timeout)
+        ftp.login(ftp_conf['user'], ftp_conf['password'])
+        if ftp_conf.get('passive_mode', True):
+            ftp.set_pasv(True)
+        home = ftp.pwd()
+
+    ftp.discarded = False
+    try:
+        yield ftp
+    except BaseException:
+        ftp.close()  # State unknown after an error; don't pool it
+        raise
+    if ftp.discarded:
+        ftp.close()
+        return
+    try:
+        _ftp_pool.put_nowait((ftp, home, time.monotonic(), key))
+    except queue.Full:
+        _quit_ftp(ftp)
+
+# Errors that escape a borrow_ftp() block drop the connection automatically; code
+# that handles an FTP error inside the block calls this, since a reply may still be pending
+def discard_ftp(ftp):
+    """Close a borrowed connection when it's returned instead of pooling it"""
+    ftp.discarded = True
+
+# Per-folder manifest of uploaded filenames, shared with timelapse.py
+UPLOAD_MANIFEST = ".uploaded.db"
+
+def open_upload_manifest(folder_path):
+    """Open a day folder's upload manifest, creating it if needed"""
+    db = sqlite3.connect(os.path.join(folder_path, UPLOAD_MANIFEST))
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("PRAGMA synchronous=NORMAL")  # WAL stays consistent; no fsync per commit
+    db.execute("CREATE TABLE IF NOT EXISTS uploaded (name TEXT PRIMARY KEY, uploaded_at INTEGER)")
+    return db
+
+def count_uploads(folder_path):
+    """Return (snapshot count, uploaded count) for a folder
+
+    Uploaded files are the manifest entries plus any legacy .uploaded markers,
+    counted once each; one scandir pass counts snapshots and finds the markers.
+    """
+    jpg_count = 0
+    uploaded = set()
+    has_manifest = False
+    manifest_in_use = False
+    with os.scandir(folder_path) as entries:
+        for entry in entries:
+            name = entry.name
+            if name.lower().endswith(".jpg"):
+                jpg_count += 1
+            elif name.endswith(".uploaded"):
+                uploaded.add(name[:-len(".uploaded")])
+            elif name == UPLOAD_MANIFEST:
+                has_manifest = True
+            elif name == UPLOAD_MANIFEST + "-wal":
+                manifest_in_use = True
+    if has_manifest:
+        # Read-only opens of a WAL database still create -wal/-shm files, which would
+        # touch the folder's mtime (and with it the folder stats cache). With no -wal
+        # present nobody is writing, so open it as immutable: no side files, no locks.
+        mode = "ro" if manifest_in_use else "ro&immutable=1"
+        try:
+            db = sqlite3.connect(f"file:{os.path.join(folder_path, UPLOAD_MANIFEST)}?mode={mode}", uri=True)
+            try:
+                uploaded.update(name for (name,) in db.execute("SELECT name FROM uploaded"))
+            finally:
+                db.close()
+        except sqlite3.Error:
+            pass
+    return jpg_count, min(len(uploaded), jpg_count)
+
 def get_ftp_upload_stats():
-    """Get FTP upload statistics by counting .uploaded marker files"""
+    """Get FTP upload statistics from the per-folder upload manifests"""
     base_dir = get_base_output_dir()
     stats = {
         "total_uploaded": 0,
@@ -161,30 +530,28 @@ def get_ftp_upload_stats():
         "by_date": []
     }
 
-    if not os.path.exists(base_dir):
+    try:
+        with os.scandir(base_dir) as entries:
+            folders = sorted(((entry.name, entry.path) for entry in entries if entry.is_dir()), reverse=True)
+    except FileNotFoundError:
         return stats
 
-    for folder in sorted(os.listdir(base_dir), reverse=True)[:7]:  # Last 7 days
-        folder_path = os.path.join(base_dir, folder)
-        if os.path.isdir(folder_path):
-            try:
-                datetime.strptime(folder, "%Y-%m-%d")
-                jpg_files = [f for f in os.listdir(folder_path) if f.lower().endswith(".jpg")]
-                uploaded_markers = [f for f in os.listdir(folder_path) if f.endswith(".uploaded")]
-
-                uploaded = len(uploaded_markers)
-                pending = len(jpg_files) - uploaded
-
-                stats["total_uploaded"] += uploaded
-                stats["total_pending"] += pending
-                stats["by_date"].append({
-                    "date": folder,
-                    "uploaded": uploaded,
-                    "pending": max(0, pending),
-                    "total": len(jpg_files)
-                })
-            except ValueError:
-                continue
+    for folder, folder_path in folders[:7]:  # Last 7 days
+        try:
+            datetime.strptime(folder, "%Y-%m-%d")
+            jpg_count, uploaded = count_uploads(folder_path)
+            pending = jpg_count - uploaded
+
+            stats["total_uploaded"] += uploaded
+            stats["total_pending"] += pending
+            stats["by_date"].append({
+                "date": folder,
+                "uploaded": uploaded,
+                "pending": max(0, pending),
+                "total": jpg_count
+            })
+        except (ValueError, FileNotFoundError):
+            continue
 
     return stats
 
@@ -199,23 +566,17 @@ def test_ftp_connection():
     }
 
     try:
-        ftp = FTP()
-        ftp.connect(ftp_conf['host'], ftp_conf.get('port', 21), timeout=10)
-        ftp.login(ftp_conf['user'], ftp_conf['password'])
-
-        if ftp_conf.get('passive_mode', True):
-            ftp.set_pasv(True)
-
-        result["server_info"] = ftp.getwelcome()
+        with borrow_ftp(timeout=10) as ftp:
+            result["server_info"] = ftp.getwelcome()
 
-        # Try to list remote root directory
-        try:
-            ftp.cwd(ftp_conf['remote_root'])
-            result["remote_dirs"] = ftp.nlst()[:20]  # Limit to 20 items
-        except:
-            result["remote_dirs"] = ["(could not list directory)"]
+            # Try to list remote root directory
+            try:
+                ftp.cwd(ftp_conf['remote_root'])
+                result["remote_dirs"] = ftp.nlst()[:20]  # Limit to 20 items
+            except all_errors:
+                result["remote_dirs"] = ["(could not list directory)"]
+                discard_ftp(ftp)  # An interrupted NLST may leave a reply pending
 
-        ftp.quit()
         result["success"] = True
         result["message"] = "Connection successful"
 
@@ -224,9 +585,35 @@ def test_ftp_connection():
 
     return result
 
+# Remote listing results, reused for a while instead of listing the server on
+# every /api/ftp/remote request; dropped after each dashboard upload
+FTP_REMOTE_STATUS_TTL = 60  # seconds
+_ftp_remote_status_cache = {}  # (connection settings, remote_root) -> (time.monotonic(), result)
+_ftp_remote_status_lock = threading.Lock()
+
+def invalidate_ftp_remote_status():
+    with _ftp_remote_status_lock:
+        _ftp_remote_status_cache.clear()
+
+def _list_remote(ftp, path, want_dirs):
+    """Names of directories (want_dirs) or files in path; MLSD when the server has it"""
+    try:
+        return [name for name, facts in ftp.mlsd(path, facts=["type"])
+                if (facts.get("type") == "dir") == want_dirs and facts.get("type") not in ("cdir", "pdir")]
+    except error_perm:
+        # No MLSD (500/502): NLST doesn't say which entries are folders, callers filter by name
+        names = ftp.nlst(path) if path else ftp.nlst()
+        return [name.rsplit("/", 1)[-1] for name in names]
+
 def get_ftp_remote_status():
     """Get status of files on FTP server"""
     ftp_conf = get_ftp_config()
+    cache_key = (_ftp_settings_key(ftp_conf), ftp_conf['remote_root'])
+    with _ftp_remote_status_lock:
+        cached = _ftp_remote_status_cache.get(cache_key)
+    if cached is not None and time.monotonic() - cached[0] < FTP_REMOTE_STATUS_TTL:
+        return cached[1]
+
     result = {
         "connected": False,
         "error": None,
@@ -235,46 +622,79 @@ def get_ftp_remote_status():
     }
 
     try:
-        ftp = FTP()
-        ftp.connect(ftp_conf['host'], ftp_conf.get('port', 21), timeout=10)
-        ftp.login(ftp_conf['user'], ftp_conf['password'])
-
-        if ftp_conf.get('passive_mode', True):
-            ftp.set_pasv(True)
-
-        # Navigate to remote root
-        try:
-            ftp.cwd(ftp_conf['remote_root'])
-        except:
-            ftp.mkd(ftp_conf['remote_root'])
-            ftp.cwd(ftp_conf['remote_root'])
-
-        # List date folders
-        folders = []
-        for item in sorted(ftp.nlst(), reverse=True)[:10]:  # Last 10 folders
+        with borrow_ftp(timeout=10) as ftp:
+            # Navigate to remote root
             try:
-                datetime.strptime(item, "%Y-%m-%d")
-                ftp.cwd(item)
-                files = [f for f in ftp.nlst() if f.lower().endswith('.jpg')]
+                ftp.cwd(ftp_conf['remote_root'])
+            except error_perm:
+                ftp.mkd(ftp_conf['remote_root'])
+                ftp.cwd(ftp_conf['remote_root'])
+
+            # List date folders
+            folders = []
+            for item in sorted(_list_remote(ftp, "", want_dirs=True), reverse=True)[:10]:  # Last 10 folders
+                try:
+                    datetime.strptime(item, "%Y-%m-%d")
+                    # Other FTP errors leave the with block, so the connection is dropped
+                    files = [f for f in _list_remote(ftp, item, want_dirs=False) if f.lower().endswith('.jpg')]
+                except (ValueError, error_perm):
+                    continue  # Not a date folder, or the server refused the listing
                 file_count = len(files)
                 result["total_files"] += file_count
                 folders.append({
                     "name": item,
                     "file_count": file_count
                 })
-                ftp.cwd("..")
-            except:
-                continue
 
         result["folders"] = folders
         result["connected"] = True
-        ftp.quit()
+        with _ftp_remote_status_lock:
+            _ftp_remote_status_cache[cache_key] = (time.monotonic(), result)
 
     except Exception as e:
         result["error"] = str(e)
 
     return result
 
+class _TransferFailed(Exception):
+    """A STOR broke off mid-transfer; its control connection can't be trusted"""
+
+def _upload_shard(names, local_dir, remote_path):
+    """Upload files on pooled connections; returns (uploaded names, error messages)"""
+    done = []
+    errors = []
+    remaining = list(names)
+    while remaining:
+        try:
+            with borrow_ftp() as ftp:
+                # storbinary() would send TYPE I and copy 8 KB blocks through Python for
+                # every file; switch to binary once, then let the kernel send each file
+                ftp.voidcmd("TYPE I")
+                while remaining:
+                    fname = remaining.pop(0)
+                    try:
+                        f = open(os.path.join(local_dir, fname), "rb")
+                    except OSError as e:
+                        errors.append(f"{fname}: {str(e)}")
+                        continue  # Nothing was sent; the connection is still clean
+                    try:
+                        with f, ftp.transfercmd(f"STOR {remote_path}/{fname}") as conn:
+                            conn.sendfile(f)
+                        ftp.voidresp()
+                    except Exception as e:
+                        errors.append(f"{fname}: {str(e)}")
+                        # Leaving the with block by exception makes borrow_ftp close the
+                        # connection instead of pooling it with a reply still pending
+                        raise _TransferFailed() from e
+                    done.append(fname)
+        except _TransferFailed:
+            continue  # Carry on with the remaining files on a fresh connection
+        except Exception as e:
+            # Couldn't connect or log in; the rest of the shard fails with it
+            errors.extend(f"{fname}: {str(e)}" for fname in remaining)
+            break
+    return done, errors
+
 def trigger_ftp_upload(date_str=None):
     """Manually trigger FTP upload for a specific date or today"""
     if date_str is None:
@@ -284,7 +704,7 @@ def trigger_ftp_upload(date_str=None):
     local_dir = os.path.join(base_dir, date_str)
     ftp_conf = get_ftp_config()
 
-    if not os.path.exists(local_dir):
+    if path_missing(local_dir):
         return {"success": False, "error": f"Local directory not found: {date_str}"}
 
     result = {
@@ -296,49 +716,59 @@ def trigger_ftp_upload(date_str=None):
     }
 
     try:
-        ftp = FTP()
-        ftp.connect(ftp_conf['host'], ftp_conf.get('port', 21), timeout=30)
-        ftp.login(ftp_conf['user'], ftp_conf['password'])
-
-        if ftp_conf.get('passive_mode', True):
-            ftp.set_pasv(True)
-
         # Navigate to/create remote path
-        remote_path = f"{ftp_conf['remote_root']}/{date_str}"
-        for part in remote_path.strip("/").split("/"):
-            try:
-                ftp.cwd(part)
-            except:
+        remote_path = f"{ftp_conf['remote_root']}/{date_str}".strip("/")
+        with borrow_ftp() as ftp:
+            for part in remote_path.split("/"):
                 try:
-                    ftp.mkd(part)
                     ftp.cwd(part)
-                except Exception as e:
-                    result["errors"].append(f"Could not create directory {part}: {e}")
+                except:
+                    try:
+                        ftp.mkd(part)
+                        ftp.cwd(part)
+                    except Exception as e:
+                        result["errors"].append(f"Could not create directory {part}: {e}")
 
         # Upload files
-        for fname in sorted(os.listdir(local_dir)):
-            if not fname.lower().endswith(".jpg"):
-                continue
-
-            local_file = os.path.join(local_dir, fname)
-            marker_file = local_file + ".uploaded"
-
-            if os.path.exists(marker_file):
-                result["skipped"] += 1
-                continue
-
-            try:
-                with open(local_file, "rb") as f:
-                    ftp.storbinary(f"STOR {fname}", f)
-                # Create marker
-                with open(marker_file, "w") as marker:
-                    marker.write("uploaded\n")
-                result["uploaded"] += 1
-            except Exception as e:
-                result["failed"] += 1
-                result["errors"].append(f"{fname}: {str(e)}")
+        manifest = open_upload_manifest(local_dir)
+        try:
+            names = sorted(os.listdir(local_dir))
+            uploaded = {name for (name,) in manifest.execute("SELECT name FROM uploaded")}
+            # Files marked by legacy .uploaded marker files also count as uploaded
+            uploaded.update(f[:-len(".uploaded")] for f in names if f.endswith(".uploaded"))
+            pending = []
+            for fname in names:
+                if not fname.lower().endswith(".jpg"):
+                    continue
+                if fname in uploaded:
+                    result["skipped"] += 1
+                else:
+                    pending.append(fname)
+
+            # Shard the files over parallel connections; results are tallied here,
+            # on the request thread, which also owns the manifest connection
+            workers = max(1, min(ftp_conf.get('upload_workers', 4), len(pending)))
+            shards = [pending[i::workers] for i in range(workers)]
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = {executor.submit(_upload_shard, shard, local_dir, remote_path): shard
+                           for shard in shards if shard}
+                for future in as_completed(futures):
+                    try:
+                        done, errors = future.result()
+                    except Exception as e:
+                        done, errors = [], [f"{fname}: {str(e)}" for fname in futures[future]]
+                    # Record in manifest
+                    manifest.executemany("INSERT OR IGNORE INTO uploaded (name, uploaded_at) VALUES (?, ?)",
+                                         [(fname, int(datetime.now().timestamp())) for fname in done])
+                    result["uploaded"] += len(done)
+                    result["failed"] += len(errors)
+                    result["errors"].extend(errors)
+        finally:
+            # One transaction for the whole run
+            manifest.commit()
+            manifest.close()
+            invalidate_ftp_remote_status()
 
-        ftp.quit()
         result["success"] = True
 
     except Exception as e:
@@ -350,65 +780,139 @@ def get_available_dates():
     """Get list of available date folders"""
     base_dir = get_base_output_dir()
     dates = []
-    if os.path.exists(base_dir):
-        for folder in sorted(os.listdir(base_dir), reverse=True):
-            folder_path = os.path.join(base_dir, folder)
-            if os.path.isdir(folder_path):
-                try:
-                    datetime.strptime(folder, "%Y-%m-%d")
-                    stats = get_folder_stats(folder_path)
-                    dates.append({
-                        "date": folder,
-                        "count": stats['count'],
-                        "size_mb": stats['size_mb']
-                    })
-                except ValueError:
-                    continue
+    for day, stats in sorted(get_all_folder_stats(base_dir), key=lambda item: item[0], reverse=True):
+        dates.append({
+            "date": day,
+            "count": stats['count'],
+            "size_mb": stats['size_mb']
+        })
     return dates
 
+# Newest-first snapshot listings of recently browsed days, valid while the folder's
+# mtime is unchanged, so paging through a day is a slice instead of a rescan
+SNAPSHOT_LISTING_CACHE_SIZE = 8
+_snapshot_listings = OrderedDict()  # folder path -> (dir mtime_ns, [snapshot dicts])
+_snapshot_listings_lock = threading.Lock()
+
+def _list_snapshots(folder_path):
+    """Snapshot dicts for a folder, newest first (names sort by capture time)"""
+    dir_mtime = os.stat(folder_path).st_mtime_ns
+    with _snapshot_listings_lock:
+        cached = _snapshot_listings.get(folder_path)
+        if cached is not None and cached[0] == dir_mtime:
+            _snapshot_listings.move_to_end(folder_path)
+            return cached[1]
+
+    snapshots = []
+    with os.scandir(folder_path) as entries:
+        for entry in entries:
+            if not entry.name.lower().endswith(".jpg"):
+                continue
+            try:
+                st = entry.stat()
+            except FileNotFoundError:
+                continue
+            snapshots.append({
+                "filename": entry.name,
+                "timestamp": datetime.fromtimestamp(st.st_mtime).strftime("%H:%M:%S"),
+                "size_kb": round(st.st_size / 1024, 1)
+            })
+    snapshots.sort(key=lambda snap: snap["filename"], reverse=True)
+
+    with _snapshot_listings_lock:
+        _snapshot_listings[folder_path] = (dir_mtime, snapshots)
+        _snapshot_listings.move_to_end(folder_path)
+        if len(_snapshot_listings) > SNAPSHOT_LISTING_CACHE_SIZE:
+            _snapshot_listings.popitem(last=False)
+    return snapshots
+
 def get_snapshots_for_date(date_str, page=1, per_page=50):
     """Get paginated list of snapshots for a specific date"""
     folder_path = os.path.join(get_base_output_dir(), date_str)
-    if not os.path.exists(folder_path):
+    if path_missing(folder_path):
         return {"snapshots": [], "total": 0, "page": page, "per_page": per_page}
 
-    jpg_files = sorted(
-        [f for f in os.listdir(folder_path) if f.lower().endswith(".jpg")],
-        reverse=True
-    )
+    try:
+        listing = _list_snapshots(folder_path)
+    except FileNotFoundError:
+        return {"snapshots": [], "total": 0, "page": page, "per_page": per_page}
 
-    total = len(jpg_files)
+    total = len(listing)
     start = (page - 1) * per_page
     end = start + per_page
 
-    snapshots = []
-    for f in jpg_files[start:end]:
-        file_path = os.path.join(folder_path, f)
-        mtime = os.path.getmtime(file_path)
-        snapshots.append({
-            "filename": f,
-            "timestamp": datetime.fromtimestamp(mtime).strftime("%H:%M:%S"),
-            "size_kb": round(os.path.getsize(file_path) / 1024, 1)
-        })
-
     return {
-        "snapshots": snapshots,
+        "snapshots": listing[start:end],
         "total": total,
         "page": page,
         "per_page": per_page,
         "total_pages": (total + per_page - 1) // per_page
     }
 
+# Written by the capture script (and take_manual_snapshot) after every snapshot;
+# holds "<day folder>/<file name>" of the newest one
+LATEST_POINTER = ".latest"
+
+def write_latest_pointer(filename):
+    """Point .latest at a just-saved snapshot"""
+    day_dir, name = os.path.split(filename)
+    base_dir, day = os.path.split(day_dir)
+    pointer = os.path.join(base_dir, LATEST_POINTER)
+    tmp_pointer = f"{pointer}.{os.getpid()}.tmp"  # The capture script writes it too
+    try:
+        with open(tmp_pointer, "w") as f:
+            f.write(f"{day}/{name}")
+        os.replace(tmp_pointer, pointer)
+    except OSError:
+        pass
+
+def read_latest_pointer():
+    """Return (date folder, path) of the newest snapshot per .latest, or (None, None)"""
+    base_dir = get_base_output_dir()
+    try:
+        with open(os.path.join(base_dir, LATEST_POINTER)) as f:
+            day, _, name = f.read().strip().partition("/")
+    except OSError:
+        return None, None
+    if not name:
+        return None, None
+    return day, os.path.join(base_dir, day, name)
+
+# The capture script keeps its newest RTSP frame here, in tmpfs (at most ~5s old while it runs)
+LIVE_FRAME_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+LIVE_FRAME = os.path.join(LIVE_FRAME_DIR, "vtime-live.jpg")
+LIVE_FRAME_MAX_AGE = 10  # seconds; older means the capture script is down or stalled
+
+def copy_live_frame(filename):
+    """Copy the capture script's live frame to filename if it is fresh; returns True on success"""
+    try:
+        if time.time() - os.stat(LIVE_FRAME).st_mtime > LIVE_FRAME_MAX_AGE:
+            return False
+        # Copy to a temp name so the gallery never lists a partial JPEG
+        shutil.copyfile(LIVE_FRAME, filename + ".tmp")
+        os.replace(filename + ".tmp", filename)
+    except OSError:
+        return False
+    return True
+
 def take_manual_snapshot():
     """Take a snapshot on demand"""
     now = datetime.now()
     today_str = now.strftime("%Y-%m-%d")
     output_dir = os.path.join(get_base_output_dir(), today_str)
     os.makedirs(output_dir, exist_ok=True)
+    forget_missing_path(output_dir)
 
     timestamp = now.strftime("%Y%m%d_%H%M%S")
     filename = os.path.join(output_dir, f"snapshot_{timestamp}.jpg")
 
+    if copy_live_frame(filename):
+        invalidate_folder_stats(output_dir)
+        forget_missing_path(filename)
+        write_latest_pointer(filename)
+        return {"success": True, "filename": os.path.basename(filename), "date": today_str}
+
+    # No fresh frame from the capture script; open our own RTSP session
     try:
         subprocess.run([
             "ffmpeg",
@@ -420,8 +924,11 @@ def take_manual_snapshot():
             "-y",
             filename
         ], check=True, timeout=15, capture_output=True)
+        invalidate_folder_stats(output_dir)
 
         if os.path.exists(filename):
+            forget_missing_path(filename)
+            write_latest_pointer(filename)
             return {"success": True, "filename": os.path.basename(filename), "date": today_str}
         else:
             return {"success": False, "error": "Snapshot file not created"}
@@ -489,8 +996,11 @@ def api_take_snapshot():
 def api_image(date_str, filename):
     """Serve an image file"""
     file_path = os.path.join(get_base_output_dir(), date_str, filename)
-    if os.path.exists(file_path) and filename.lower().endswith('.jpg'):
-        return send_file(file_path, mimetype='image/jpeg')
+    if filename.lower().endswith('.jpg') and not path_missing(file_path):
+        response = send_file(file_path, mimetype='image/jpeg', max_age=IMAGE_MAX_AGE)
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        return response
     return jsonify({"error": "Image not found"}), 404
 
 @app.route('/api/latest')
@@ -498,11 +1008,22 @@ def api_latest():
     """Get the most recent snapshot"""
     now = datetime.now()
     today_str = now.strftime("%Y-%m-%d")
-    today_dir = os.path.join(get_base_output_dir(), today_str)
 
-    stats = get_folder_stats(today_dir)
-    if stats['latest']:
-        return send_file(stats['latest'], mimetype='image/jpeg')
+    # Serve the file named by the pointer; only scan the folder if it's missing or stale
+    day, latest = read_latest_pointer()
+    if day != today_str or not os.path.exists(latest):
+        latest = get_folder_stats(os.path.join(get_base_output_dir(), today_str))['latest']
+
+    if latest:
+        try:
+            response = send_file(latest, mimetype='image/jpeg')
+        except FileNotFoundError:
+            pass  # Removed between the lookup and the send
+        else:
+            # Same URL, changing content: clients must revalidate, and send_file's
+            # ETag/Last-Modified turn that into a 304 until a new snapshot exists
+            response.cache_control.no_cache = True
+            return response
 
     return jsonify({"error": "No snapshots available"}), 404
 
@@ -620,4 +1141,17 @@ if __name__ == '__main__':
     print(f"Starting server at http://localhost:5050")
     print("=" * 50)
 
-    app.run(host='0.0.0.0', port=5050, debug=True)
+    # Exit normally on SIGTERM (systemd stop) so atexit handlers flush pending saves
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+    # VTIME_DEBUG=1 keeps Flask's reloading debug server for development
+    if os.environ.get("VTIME_DEBUG") == "1":
+        app.run(host='0.0.0.0', port=5050, debug=True)
+    else:
+        try:
+            from waitress import serve
+        except ImportError:
+            print("[Server] waitress not installed, using Flask's threaded server")
+            app.run(host='0.0.0.0', port=5050, threaded=True)
+        else:
+            serve(app, host='0.0.0.0', port=5050, threads=8, asyncore_use_poll=True)